@@ -1,28 +1,79 @@
 #!/usr/bin/env python3
 
+import atexit
 import os
+import shutil
+import functools
+import hashlib
+import re
 import sys
 import tempfile
 import subprocess
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 from pathlib import Path
 
-def load_config():
-    """Load API key from .env file"""
+# KEY=value lines in .env
+_ENV_LINE = re.compile(rb'^([A-Za-z_][A-Za-z0-9_]*)=(.*)$', re.M)
+
+# Amounts are rounded to whole cents
+_CENT = Decimal('0.01')
+
+# Menu choice to entry type
+_TYPE_MAP = {'1': 'task', '2': 'note', '3': 'bookmark'}
+
+# Seconds to wait for the API to connect or send data
+_REQUEST_TIMEOUT = 10
+
+# Read size used when streaming response bodies
+_CHUNK_SIZE = 64 * 1024
+
+# ETag, on-disk copy and digest of the last fetch of each URL, used to
+# revalidate repeat fetches
+_etag_cache = {}
+
+# Submenus rendered up front so each redraw is a single write
+_ENTRY_CHOICES = "(1) Task, (2) Note, (3) Bookmark, (4) Finances, (5) Back"
+_PUT_MENU = f"\n=== Put ===\n\n{_ENTRY_CHOICES}: "
+_PUT_BATCH_MENU = f"\n=== Put ===\n\n{_ENTRY_CHOICES}, (6) Flush Batch: "
+_FETCH_MENU = f"\n=== Fetch ===\n\n{_ENTRY_CHOICES}: "
+_FINANCES_MENU = "\n=== Finances ===\n\n(1) Spend, (2) Income, (3) Budget, (4) Back: "
+_FINANCIAL_DATA_MENU = (
+    "\n=== Financial Data ===\n\n"
+    "(1) Transactions, (2) Categories, (3) Budget, (4) Income, (5) Back: "
+)
+
+@functools.lru_cache(maxsize=1)
+def load_env():
+    """Parse .env file into a dict, only read once per run"""
     env_file = Path(__file__).parent / '.env'
     if not env_file.exists():
         print("Error: .env file not found. Please create it with WELL_API_KEY=your_key")
         sys.exit(1)
     
-    with open(env_file) as f:
-        for line in f:
-            if line.startswith('WELL_API_KEY='):
-                return line.split('=', 1)[1].strip()
+    # One regex pass over the whole file, comment lines never match
+    pairs = _ENV_LINE.findall(env_file.read_bytes())
+    return {key.decode(): value.decode().strip() for key, value in pairs}
+
+def load_config():
+    """Load API key from .env file"""
+    api_key = load_env().get('WELL_API_KEY')
+    if api_key is None:
+        print("Error: WELL_API_KEY not found in .env file")
+        sys.exit(1)
     
-    print("Error: WELL_API_KEY not found in .env file")
-    sys.exit(1)
+    return api_key
 
+@functools.lru_cache(maxsize=1)
 def load_art():
     ascii_file = Path(__file__).parent / 'well.txt'
 
@@ -30,88 +81,241 @@ def load_art():
         print("Error: well.txt art file not found. Please create it")
         sys.exit(1)
 
-    with open(ascii_file, 'r') as f:
-        # Read the entire content of the file
-        # and store it in a single string variable
-        return f.read()       
+    # Read the whole file once, later calls reuse the cached string
+    return ascii_file.read_bytes().decode()
 
-def get_type_by_choice(choice):
-    """Convert choice number to entry type"""
-    type_map = {'1': 'task', '2': 'note', '3': 'bookmark'}
-    return type_map.get(choice)
+def encode_json(data):
+    """Serialise a request body to UTF-8 JSON bytes"""
+    # The session already sends Content-Type: application/json
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
 
-def get_categories(base_url, headers):
-    """Get categories and subcategories from API"""
+def content_digest(data):
+    """Digest of content with surrounding whitespace ignored, for change detection"""
+    return hashlib.blake2b(data.strip(), digest_size=16).digest()
+
+def download_to_temp(response, suffix):
+    """Stream a response body into a new temp file, return its path and content digest"""
+    # The digest is built while copying so the body is never held in memory.
+    # Leading and trailing whitespace is held back to match content_digest().
+    digest = hashlib.blake2b(digest_size=16)
+    pending = b''
+    started = False
+    
+    fd, temp_path = tempfile.mkstemp(suffix=suffix)
     try:
-        response = requests.get(f"{base_url}/categories", headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get('categories', {})
-        else:
-            print(f"Error getting categories: {response.status_code} - {response.text}")
-            return {}
-    except Exception as e:
-        print(f"Error getting categories: {e}")
-        return {}
+        with os.fdopen(fd, 'wb') as temp_file:
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                temp_file.write(chunk)
+                if not started:
+                    chunk = chunk.lstrip()
+                    started = bool(chunk)
+                body = chunk.rstrip()
+                if body:
+                    digest.update(pending + body)
+                    pending = chunk[len(body):]
+                else:
+                    pending += chunk
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    
+    return temp_path, digest.digest()
+
+def drop_cached(url):
+    """Forget the cached fetch of url, returning its entry or None"""
+    cached = _etag_cache.pop(url, None)
+    if cached:
+        try:
+            os.unlink(cached[1])
+        except OSError:
+            pass
+    return cached
+
+@atexit.register
+def clear_cache():
+    """Remove the on-disk copies of cached fetches"""
+    for url in list(_etag_cache):
+        drop_cached(url)
 
-def add_category(base_url, headers, category):
-    """Add new category"""
+def fetch_to_temp(session, url, suffix):
+    """Stream url into a new temp file, return its path and content digest or None on error"""
+    cached = _etag_cache.get(url)
+    headers = {'If-None-Match': cached[0]} if cached else None
+    
+    with session.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304 and cached:
+            # Unchanged since we last fetched it
+            fd, temp_path = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            shutil.copyfile(cached[1], temp_path)
+            return temp_path, cached[2]
+        
+        if response.status_code != 200:
+            print(f"\nStatus: {response.status_code}")
+            print(f"Response: {response.text}")
+            return None
+        
+        temp_path, digest = download_to_temp(response, suffix)
+        etag = response.headers.get('ETag')
+    
+    # Keep a copy on disk rather than in memory, the caller deletes temp_path
+    drop_cached(url)
+    if etag:
+        fd, cache_path = tempfile.mkstemp(prefix='bucket-cache-', suffix=suffix)
+        os.close(fd)
+        shutil.copyfile(temp_path, cache_path)
+        _etag_cache[url] = (etag, cache_path, digest)
+    return temp_path, digest
+
+def put_if_unchanged(session, url, payload, fetched_url, temp_path):
+    """PUT payload to url, refused by the server if it changed since we fetched fetched_url"""
+    headers = {}
+    cached = drop_cached(fetched_url)
+    # The tag only describes url when that is what was fetched, e.g. not for
+    # well PUTs which go to /well after fetching /well?type=...
+    # Weak validators never match If-Match, so only send strong ones.
+    if url == fetched_url and cached and not cached[0].startswith('W/'):
+        headers['If-Match'] = cached[0]
+    
+    put_response = session.put(url, data=encode_json(payload), headers=headers)
+    if put_response.status_code == 412:
+        # The caller deletes temp_path, keep a copy so the edits aren't lost
+        fd, saved_path = tempfile.mkstemp(prefix='bucket-', suffix=os.path.splitext(temp_path)[1])
+        os.close(fd)
+        shutil.copyfile(temp_path, saved_path)
+        print("\nFile was changed on the server since it was fetched, update not applied.")
+        print(f"Your edits were saved to {saved_path}")
+    return put_response
+
+@functools.lru_cache(maxsize=None)
+def get_editor(default):
+    """Resolve the user's editor to a full path once per run"""
+    # A full path lets open_editor's subprocess.run use posix_spawn()
+    editor = os.getenv('EDITOR', default)
+    return shutil.which(editor) or editor
+
+def open_editor(editor, path):
+    """Open path in the user's editor and wait for it to exit"""
+    # close_fds=False lets subprocess use posix_spawn() instead of fork+exec,
+    # but only for an editor path with a directory in it, which get_editor()
+    # provides. This is safe as we hold no sensitive fds and the temp file is
+    # closed before the editor is started.
+    subprocess.run([editor, path], close_fds=False)
+
+def edit_file(editor, path):
+    """Edit path and return its stripped content, or None if it was never saved"""
+    before = os.stat(path)
+    open_editor(editor, path)
+    
+    # An untouched file can't have changed, skip reading it back. Size is
+    # compared too since a save within the same mtime tick keeps st_mtime_ns
+    stat = os.stat(path)
+    if (stat.st_mtime_ns, stat.st_size) == (before.st_mtime_ns, before.st_size):
+        return None
+    if stat.st_size == 0:
+        return b''
+    
+    with open(path, 'rb') as f:
+        return f.read().strip()
+
+def check_status(response, expected):
+    """Check response has the expected status code, reporting it if not"""
+    if response.status_code == expected:
+        return True
+    print(f"Server response: {response.status_code} - {response.text}")
+    return False
+
+def get_categories(session, base_url):
+    """Get categories and subcategories from API, None if the request failed"""
     try:
-        response = requests.post(
-            f"{base_url}/categories",
-            json={'category': category},
-            headers=headers
-        )
-        if response.status_code != 201:
-            print(f"Server response: {response.status_code} - {response.text}")
-        return response.status_code == 201
-    except Exception as e:
-        print(f"Error adding category: {e}")
-        return False
+        response = session.get(f"{base_url}/categories")
+        if not check_status(response, 200):
+            return None
+        return response.json().get('categories', {})
+    except requests.RequestException as e:
+        print(f"Error getting categories: {e}")
+        return None
 
-def add_subcategory(base_url, headers, category, subcategory):
-    """Add new subcategory"""
+def add_subcategory(session, base_url, category, subcategory):
+    """Add new subcategory, creating the category too if it doesn't exist"""
     try:
-        response = requests.post(
+        response = session.post(
             f"{base_url}/categories",
-            json={'category': category, 'subcategory': subcategory},
-            headers=headers
+            data=encode_json({'category': category, 'subcategory': subcategory})
         )
-        if response.status_code != 201:
-            print(f"Server response: {response.status_code} - {response.text}")
-        return response.status_code == 201
-    except Exception as e:
+        return check_status(response, 201)
+    except requests.RequestException as e:
         print(f"Error adding subcategory: {e}")
         return False
 
+class CategoriesCache:
+    """Categories fetched once per submenu session and kept up to date locally"""
+    
+    def __init__(self, session, base_url):
+        self.session = session
+        self.base_url = base_url
+        self._data = None
+    
+    def get(self):
+        """Return categories, fetching them from the API on first use"""
+        if self._data is None:
+            self._data = get_categories(self.session, self.base_url)
+        return self._data if self._data is not None else {}
+    
+    def prefetch(self):
+        """Quietly fetch categories ahead of get(), leaving failures for get() to report"""
+        if self._data is not None:
+            return
+        response = self.session.get(f"{self.base_url}/categories")
+        if response.status_code == 200:
+            self._data = response.json().get('categories', {})
+    
+    def add_local(self, category, subcategory=None):
+        """Record a category or subcategory that was added on the server"""
+        if self._data is None:
+            return
+        subcategories = self._data.setdefault(category, [])
+        if subcategory is not None and subcategory not in subcategories:
+            subcategories.append(subcategory)
+    
+    def invalidate(self):
+        """Forget cached categories so the next get() refetches them"""
+        self._data = None
+
+def prompt(message):
+    """Read one line of input, used by the prompts that re-ask on invalid data"""
+    # Plain stdio instead of input(), these loops don't need line editing
+    sys.stdout.write(message)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip('\n')
+
 def get_date_input():
     """Get date input from user"""
     while True:
-        choice = input("Date: (1) Today, (2) Custom date [1]: ").strip() or '1'
+        choice = prompt("Date: (1) Today, (2) Custom date [1]: ").strip() or '1'
         
         if choice == '1':
-            from datetime import date
             return date.today().isoformat()
         elif choice == '2':
             while True:
-                date_input = input("Enter date (YYYY-MM-DD): ").strip()
-                if len(date_input) == 10 and date_input[4] == '-' and date_input[7] == '-':
-                    try:
-                        year, month, day = map(int, date_input.split('-'))
-                        from datetime import date
-                        date(year, month, day)  # Validate date
-                        return date_input
-                    except ValueError:
-                        print("Invalid date. Please use YYYY-MM-DD format.")
-                else:
-                    print("Invalid format. Please use YYYY-MM-DD.")
+                date_input = prompt("Enter date (YYYY-MM-DD): ").strip()
+                try:
+                    # isoformat() normalises the other ISO forms 3.11 accepts
+                    return date.fromisoformat(date_input).isoformat()
+                except ValueError:
+                    print("Invalid date. Please use YYYY-MM-DD format.")
         else:
             print("Invalid choice. Please enter 1 or 2.")
 
 def get_name_input():
     """Get name input from user"""
     while True:
-        name = input("Name: ").strip()
+        name = prompt("Name: ").strip()
         if name:
             return name
         else:
@@ -120,89 +324,95 @@ def get_name_input():
 def get_amount_input():
     """Get amount input from user"""
     while True:
-        amount_input = input("Amount: ").strip()
+        amount_input = prompt("Amount: ").strip()
         try:
-            amount = float(amount_input)
+            amount = Decimal(amount_input).quantize(_CENT, rounding=ROUND_HALF_UP)
             if amount > 0:
-                return round(amount, 2)
+                # Rounded in decimal, the API still takes a JSON number
+                return float(amount)
             else:
                 print("Amount must be positive.")
-        except ValueError:
+        except InvalidOperation:
             print("Invalid amount. Please enter a number.")
 
-def select_category(categories, base_url, headers):
+def create_category(cache):
+    """Add a new category together with its first subcategory"""
+    while True:
+        category = prompt("Enter new category name: ").strip()
+        if not category:
+            print("Category name is required.")
+            continue
+        
+        # Ask for the subcategory up front, a new category needs one anyway
+        while True:
+            subcategory = prompt("Enter new subcategory name: ").strip()
+            if subcategory:
+                break
+            print("Subcategory name is required.")
+        
+        # The categories endpoint creates both from one request
+        if add_subcategory(cache.session, cache.base_url, category, subcategory):
+            print(f"Category '{category}' with subcategory '{subcategory}' added successfully.")
+            cache.add_local(category, subcategory)
+            return category, subcategory
+        else:
+            cache.invalidate()
+            print("Failed to add category. Please try again.")
+
+def select_category(cache):
     """Select category from list or add new"""
+    categories = cache.get()
     if not categories:
         # No categories exist, must create one
         print("No categories exist yet.")
-        while True:
-            category = input("Enter new category name: ").strip()
-            if category:
-                if add_category(base_url, headers, category):
-                    print(f"Category '{category}' added successfully.")
-                    return category, select_subcategory(category, [], base_url, headers)
-                else:
-                    print("Failed to add category. Please try again.")
-            else:
-                print("Category name is required.")
+        return create_category(cache)
     
     while True:
-        print("\nCategories:")
         category_list = list(categories.keys())
-        for i, cat in enumerate(category_list, 1):
-            print(f"  ({i}) {cat}")
-        print(f"  ({len(category_list) + 1}) Add New Category")
+        lines = [f"  ({i}) {cat}" for i, cat in enumerate(category_list, 1)]
+        lines.append(f"  ({len(category_list) + 1}) Add New Category")
+        print("\nCategories:\n" + "\n".join(lines))
         
-        choice = input(f"Select category [1-{len(category_list) + 1}]: ").strip()
+        choice = prompt(f"Select category [1-{len(category_list) + 1}]: ").strip()
         
         try:
             choice_num = int(choice)
             if 1 <= choice_num <= len(category_list):
                 selected_category = category_list[choice_num - 1]
-                subcategory = select_subcategory(selected_category, categories[selected_category], base_url, headers)
+                subcategory = select_subcategory(cache, selected_category)
                 return selected_category, subcategory
             elif choice_num == len(category_list) + 1:
-                # Add new category
-                while True:
-                    new_category = input("Enter new category name: ").strip()
-                    if new_category:
-                        if add_category(base_url, headers, new_category):
-                            print(f"Category '{new_category}' added successfully.")
-                            categories[new_category] = []  # Update local cache
-                            subcategory = select_subcategory(new_category, [], base_url, headers)
-                            return new_category, subcategory
-                        else:
-                            print("Failed to add category. Please try again.")
-                    else:
-                        print("Category name is required.")
+                return create_category(cache)
             else:
                 print(f"Invalid choice. Please enter 1-{len(category_list) + 1}.")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-def select_subcategory(category, subcategories, base_url, headers):
+def select_subcategory(cache, category):
     """Select subcategory from list or add new"""
+    subcategories = cache.get().get(category, [])
     if not subcategories:
         # No subcategories exist, must create one
         print(f"No subcategories exist for '{category}'. Let's create one.")
         while True:
-            subcategory = input("Enter new subcategory name: ").strip()
+            subcategory = prompt("Enter new subcategory name: ").strip()
             if subcategory:
-                if add_subcategory(base_url, headers, category, subcategory):
+                if add_subcategory(cache.session, cache.base_url, category, subcategory):
                     print(f"Subcategory '{subcategory}' added successfully.")
+                    cache.add_local(category, subcategory)
                     return subcategory
                 else:
+                    cache.invalidate()
                     print("Failed to add subcategory. Please try again.")
             else:
                 print("Subcategory name is required.")
     
     while True:
-        print(f"\nSubcategories for {category}:")
-        for i, sub in enumerate(subcategories, 1):
-            print(f"  ({i}) {sub}")
-        print(f"  ({len(subcategories) + 1}) Add New Subcategory")
+        lines = [f"  ({i}) {sub}" for i, sub in enumerate(subcategories, 1)]
+        lines.append(f"  ({len(subcategories) + 1}) Add New Subcategory")
+        print(f"\nSubcategories for {category}:\n" + "\n".join(lines))
         
-        choice = input(f"Select subcategory [1-{len(subcategories) + 1}]: ").strip()
+        choice = prompt(f"Select subcategory [1-{len(subcategories) + 1}]: ").strip()
         
         try:
             choice_num = int(choice)
@@ -211,12 +421,14 @@ def select_subcategory(category, subcategories, base_url, headers):
             elif choice_num == len(subcategories) + 1:
                 # Add new subcategory
                 while True:
-                    new_subcategory = input("Enter new subcategory name: ").strip()
+                    new_subcategory = prompt("Enter new subcategory name: ").strip()
                     if new_subcategory:
-                        if add_subcategory(base_url, headers, category, new_subcategory):
+                        if add_subcategory(cache.session, cache.base_url, category, new_subcategory):
                             print(f"Subcategory '{new_subcategory}' added successfully.")
+                            cache.add_local(category, new_subcategory)
                             return new_subcategory
                         else:
+                            cache.invalidate()
                             print("Failed to add subcategory. Please try again.")
                     else:
                         print("Subcategory name is required.")
@@ -228,7 +440,7 @@ def select_subcategory(category, subcategories, base_url, headers):
 def get_payment_method():
     """Get payment method from user"""
     while True:
-        choice = input("Payment Method: (1) Credit, (2) Debit [1]: ").strip() or '1'
+        choice = prompt("Payment Method: (1) Credit, (2) Debit [1]: ").strip() or '1'
         if choice == '1':
             return 'credit'
         elif choice == '2':
@@ -241,26 +453,41 @@ def get_notes():
     notes = input("Notes [optional]: ").strip()
     return notes
 
-def spend_entry(base_url, headers):
+def spend_entry(session, base_url, categories):
     """Add a new financial entry"""
     try:
         print("\n=== Spend Entry ===")
         
-        # Get all inputs
-        date = get_date_input()
-        name = get_name_input()
-        amount = get_amount_input()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            # Fetch categories in the background while the user types,
+            # this returns straight away once they are cached
+            categories_future = executor.submit(categories.prefetch)
+            
+            # Get all inputs
+            entry_date = get_date_input()
+            name = get_name_input()
+            amount = get_amount_input()
+        except BaseException:
+            # Don't wait on a stalled prefetch when the form is abandoned
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        
+        try:
+            categories_future.result()
+        except Exception:
+            # Not fatal, select_category fetches again and reports any error
+            pass
+        executor.shutdown()
         
-        # Get categories
-        categories = get_categories(base_url, headers)
-        category, subcategory = select_category(categories, base_url, headers)
+        category, subcategory = select_category(categories)
         
         payment_method = get_payment_method()
         notes = get_notes()
         
         # Create entry
         entry_data = {
-            'date': date,
+            'date': entry_date,
             'name': name,
             'amount': amount,
             'category': category,
@@ -270,10 +497,9 @@ def spend_entry(base_url, headers):
         }
         
         # Send to API
-        response = requests.post(
+        response = session.post(
             f"{base_url}/spend",
-            json=entry_data,
-            headers=headers
+            data=encode_json(entry_data)
         )
         
         if response.status_code == 201:
@@ -287,28 +513,27 @@ def spend_entry(base_url, headers):
     except Exception as e:
         print(f"Error: {e}")
 
-def add_income(base_url, headers):
+def add_income(session, base_url):
     """Add a new income entry"""
     try:
         print("\n=== Income Entry ===")
         
         # Get all inputs
-        date = get_date_input()
+        entry_date = get_date_input()
         name = get_name_input()
         amount = get_amount_input()
         
         # Create entry
         entry_data = {
-            'date': date,
+            'date': entry_date,
             'name': name,
             'amount': amount
         }
         
         # Send to API
-        response = requests.post(
+        response = session.post(
             f"{base_url}/income",
-            json=entry_data,
-            headers=headers
+            data=encode_json(entry_data)
         )
         
         if response.status_code == 201:
@@ -322,113 +547,162 @@ def add_income(base_url, headers):
     except Exception as e:
         print(f"Error: {e}")
 
-def write_entry(base_url, headers, entry_type):
-    """Write a new entry"""
-    editor = os.getenv('EDITOR', 'nano')
-    
-    # Create temp file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as temp_file:
-        temp_path = temp_file.name
-    
-    try:
-        # Open editor
-        subprocess.run([editor, temp_path])
+def write_entry(session, base_url, entry_type, pending=None):
+    """Write a new entry, or queue it on pending in batch mode"""
+    if not os.isatty(0):
+        # Content is being piped in, no editor needed
+        content = sys.stdin.read().strip()
+    else:
+        editor = get_editor('nano')
         
-        # Read content back
-        with open(temp_path, 'r') as f:
-            content = f.read().strip()
+        # Create temp file
+        fd, temp_path = tempfile.mkstemp(suffix='.md')
+        os.close(fd)
         
-        if not content:
-            print("No content entered. Cancelled.")
-            return
+        try:
+            # Open editor, nothing is read back if it wasn't saved
+            content = edit_file(editor, temp_path)
+        finally:
+            # Clean up temp file
+            os.unlink(temp_path)
         
-        # Post to API
-        response = requests.post(
-            base_url,
-            json={'type': entry_type, 'body': content},
-            headers=headers
-        )
+        content = content.decode() if content else ''
+    
+    if not content:
+        print("No content entered. Cancelled.")
+        return
+    
+    if pending is not None:
+        # Batch mode, sent with the next flush
+        pending.append({'type': entry_type, 'body': content})
+        print(f"Queued {entry_type}. {len(pending)} {'entry' if len(pending) == 1 else 'entries'} pending.")
+        return
+    
+    # Post to API
+    response = session.post(
+        base_url,
+        data=encode_json({'type': entry_type, 'body': content})
+    )
+    
+    print(f"\nStatus: {response.status_code}")
+    print(f"Response: {response.text}")
+
+def flush_batch(session, base_url, pending):
+    """Post all queued entries in a single request"""
+    if not pending:
+        print("Nothing to flush.")
+        return
+    
+    try:
+        response = session.post(f"{base_url}/batch", data=encode_json(pending))
         
         print(f"\nStatus: {response.status_code}")
         print(f"Response: {response.text}")
         
-    finally:
-        # Clean up temp file
-        os.unlink(temp_path)
+        if response.status_code in (200, 201):
+            pending.clear()
+    except Exception as e:
+        print(f"Error flushing batch: {e}")
 
-def finances_put_submenu(vault_base_url, headers):
+def finances_put_submenu(session, vault_base_url):
     """Finances put submenu loop"""
+    # Shared by spend entries so categories are only fetched once
+    categories = CategoriesCache(session, vault_base_url)
+    
     while True:
-        print("\n=== Finances ===")
-        choice = input("\n(1) Spend, (2) Income, (3) Budget, (4) Back: ").strip()
+        choice = input(_FINANCES_MENU).strip()
         
         if choice == '1':
-            spend_entry(vault_base_url, headers)
+            spend_entry(session, vault_base_url, categories)
         elif choice == '2':
-            add_income(vault_base_url, headers)
+            add_income(session, vault_base_url)
         elif choice == '3':
-            duplicate_and_edit_budget(vault_base_url, headers)
+            duplicate_and_edit_budget(session, vault_base_url)
         elif choice == '4':
             break
         else:
             print("Invalid choice. Press 1-4")
 
-def write_submenu(well_base_url, vault_base_url, headers):
+def write_submenu(session, well_base_url, vault_base_url):
     """Stay in write submenu loop"""
-    while True:
-        print("\n=== Put ===")
-        choice = input("\n(1) Task, (2) Note, (3) Bookmark, (4) Finances, (5) Back: ").strip()
-        
-        if choice in '123':
-            entry_type = get_type_by_choice(choice)
+    # With WELL_BATCH=1 entries are queued and posted together
+    pending = [] if os.getenv('WELL_BATCH') == '1' else None
+    menu = _PUT_BATCH_MENU if pending is not None else _PUT_MENU
+    
+    try:
+        while True:
+            choice = input(menu).strip()
+            
+            entry_type = _TYPE_MAP.get(choice)
             if entry_type:
-                write_entry(well_base_url, headers, entry_type)
-        elif choice == '4':
-            finances_put_submenu(vault_base_url, headers)
-        elif choice == '5':
-            break
-        else:
-            print("Invalid choice. Press 1-5")
+                write_entry(session, well_base_url, entry_type, pending)
+            elif choice == '4':
+                finances_put_submenu(session, vault_base_url)
+            elif choice == '5':
+                if pending:
+                    flush_batch(session, well_base_url, pending)
+                if pending:
+                    discard_choice = input(f"Discard {len(pending)} unsent {'entry' if len(pending) == 1 else 'entries'}? (y/n): ").strip().lower()
+                    if discard_choice != 'y':
+                        continue
+                break
+            elif choice == '6' and pending is not None:
+                flush_batch(session, well_base_url, pending)
+            else:
+                print(f"Invalid choice. Press 1-{6 if pending is not None else 5}")
+    except EOFError:
+        # Input ran out, send what was queued rather than dropping it
+        if pending:
+            print()
+            flush_batch(session, well_base_url, pending)
+        if pending:
+            print(f"Warning: {len(pending)} queued {'entry was' if len(pending) == 1 else 'entries were'} not sent.")
+        raise
 
-def read_entry(base_url, headers, entry_type):
+def read_entry(session, base_url, entry_type):
     """Read and optionally edit entries of a specific type"""
-    editor = os.getenv('EDITOR', 'nvim')
+    editor = get_editor('nvim')
+    
+    url = f"{base_url}?type={entry_type}"
     
     try:
-        # Get original content from API
-        response = requests.get(f"{base_url}?type={entry_type}", headers=headers)
-        
-        if response.status_code != 200:
-            print(f"\nStatus: {response.status_code}")
-            print(f"Response: {response.text}")
+        if not (os.isatty(0) and os.isatty(1)):
+            # Not driven from a terminal so no editor can run, just print it
+            with session.get(url, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"\nStatus: {response.status_code}")
+                    print(f"Response: {response.text}")
+                    return
+                
+                sys.stdout.flush()
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
             return
         
-        original_content = response.text.strip()
-        
-        # Create temp file with original content
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as temp_file:
-            temp_file.write(original_content)
-            temp_path = temp_file.name
+        # Create temp file with original content from API
+        fetched = fetch_to_temp(session, url, '.md')
+        if fetched is None:
+            return
+        temp_path, original_digest = fetched
         
         try:
             # Open editor for editing
-            subprocess.run([editor, temp_path])
-            
-            # Read new content after editing
-            with open(temp_path, 'r') as f:
-                new_content = f.read().strip()
+            new_bytes = edit_file(editor, temp_path)
             
             # Check if changes were made
-            if original_content != new_content:
+            if new_bytes is not None and content_digest(new_bytes) != original_digest:
                 print("Changes detected!")
                 update_choice = input("Update file on VPS? (y/n): ").strip().lower()
                 
                 if update_choice == 'y':
                     # Use PUT endpoint to replace entire file
-                    put_response = requests.put(
+                    put_response = put_if_unchanged(
+                        session,
                         base_url,
-                        json={'type': entry_type, 'content': new_content},
-                        headers=headers
+                        {'type': entry_type, 'content': new_bytes.decode()},
+                        url,
+                        temp_path
                     )
                     print(f"\nUpdate Status: {put_response.status_code}")
                     print(f"Update Response: {put_response.text}")
@@ -444,46 +718,30 @@ def read_entry(base_url, headers, entry_type):
     except Exception as e:
         print(f"Error: {e}")
 
-def edit_transactions(vault_base_url, headers):
+def edit_transactions(session, vault_base_url):
     """Edit all transactions using external editor"""
-    editor = os.getenv('EDITOR', 'nvim')
+    editor = get_editor('nvim')
+    url = f"{vault_base_url}/data"
     
     try:
-        # Get original content from API
-        response = requests.get(f"{vault_base_url}/data", headers=headers)
-        
-        if response.status_code != 200:
-            print(f"\nStatus: {response.status_code}")
-            print(f"Response: {response.text}")
+        # Create temp file with original CSV content from API
+        fetched = fetch_to_temp(session, url, '.csv')
+        if fetched is None:
             return
-        
-        original_content = response.text.strip()
-        
-        # Create temp file with original CSV content
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as temp_file:
-            temp_file.write(original_content)
-            temp_path = temp_file.name
+        temp_path, original_digest = fetched
         
         try:
             # Open editor for editing
-            subprocess.run([editor, temp_path])
-            
-            # Read new content after editing
-            with open(temp_path, 'r') as f:
-                new_content = f.read().strip()
+            new_bytes = edit_file(editor, temp_path)
             
             # Check if changes were made
-            if original_content != new_content:
+            if new_bytes is not None and content_digest(new_bytes) != original_digest:
                 print("Changes detected!")
                 update_choice = input("Update transaction data on VPS? (y/n): ").strip().lower()
                 
                 if update_choice == 'y':
                     # Use PUT endpoint to replace entire file
-                    put_response = requests.put(
-                        f"{vault_base_url}/data",
-                        json={'content': new_content},
-                        headers=headers
-                    )
+                    put_response = put_if_unchanged(session, url, {'content': new_bytes.decode()}, url, temp_path)
                     print(f"\nUpdate Status: {put_response.status_code}")
                     print(f"Update Response: {put_response.text}")
                 else:
@@ -498,46 +756,30 @@ def edit_transactions(vault_base_url, headers):
     except Exception as e:
         print(f"Error editing transactions: {e}")
 
-def edit_categories(vault_base_url, headers):
+def edit_categories(session, vault_base_url):
     """Edit all categories using external editor"""
-    editor = os.getenv('EDITOR', 'nvim')
+    editor = get_editor('nvim')
+    url = f"{vault_base_url}/categories"
     
     try:
-        # Get original content from API
-        response = requests.get(f"{vault_base_url}/categories", headers=headers)
-        
-        if response.status_code != 200:
-            print(f"\nStatus: {response.status_code}")
-            print(f"Response: {response.text}")
+        # Create temp file with the JSON exactly as the API sent it
+        fetched = fetch_to_temp(session, url, '.json')
+        if fetched is None:
             return
-        
-        original_content = json.dumps(response.json(), indent=2)
-        
-        # Create temp file with original JSON content
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
-            temp_file.write(original_content)
-            temp_path = temp_file.name
+        temp_path, original_digest = fetched
         
         try:
             # Open editor for editing
-            subprocess.run([editor, temp_path])
-            
-            # Read new content after editing
-            with open(temp_path, 'r') as f:
-                new_content = f.read().strip()
+            new_bytes = edit_file(editor, temp_path)
             
             # Check if changes were made
-            if original_content != new_content:
+            if new_bytes is not None and content_digest(new_bytes) != original_digest:
                 print("Changes detected!")
                 update_choice = input("Update categories on VPS? (y/n): ").strip().lower()
                 
                 if update_choice == 'y':
                     # Use PUT endpoint to replace entire file
-                    put_response = requests.put(
-                        f"{vault_base_url}/categories",
-                        json={'content': new_content},
-                        headers=headers
-                    )
+                    put_response = put_if_unchanged(session, url, {'content': new_bytes.decode()}, url, temp_path)
                     print(f"\nUpdate Status: {put_response.status_code}")
                     print(f"Update Response: {put_response.text}")
                 else:
@@ -552,13 +794,13 @@ def edit_categories(vault_base_url, headers):
     except Exception as e:
         print(f"Error editing categories: {e}")
 
-def edit_budget(vault_base_url, headers):
+def edit_budget(session, vault_base_url):
     """Edit budget file using external editor"""
-    editor = os.getenv('EDITOR', 'nvim')
+    editor = get_editor('nvim')
     
     try:
         # Get original content from API
-        response = requests.get(f"{vault_base_url}/budget", headers=headers)
+        response = session.get(f"{vault_base_url}/budget")
         
         if response.status_code != 200:
             print(f"\nStatus: {response.status_code}")
@@ -574,7 +816,7 @@ def edit_budget(vault_base_url, headers):
         
         try:
             # Open editor for editing
-            subprocess.run([editor, temp_path])
+            open_editor(editor, temp_path)
             
             # Read new content after editing
             with open(temp_path, 'r') as f:
@@ -587,10 +829,9 @@ def edit_budget(vault_base_url, headers):
                 
                 if update_choice == 'y':
                     # Use PUT endpoint to replace entire file
-                    put_response = requests.put(
+                    put_response = session.put(
                         f"{vault_base_url}/budget",
-                        json={'content': new_content},
-                        headers=headers
+                        data=encode_json({'content': new_content})
                     )
                     print(f"\nUpdate Status: {put_response.status_code}")
                     print(f"Update Response: {put_response.text}")
@@ -606,46 +847,30 @@ def edit_budget(vault_base_url, headers):
     except Exception as e:
         print(f"Error editing budget: {e}")
 
-def edit_income(vault_base_url, headers):
+def edit_income(session, vault_base_url):
     """Edit all income using external editor"""
-    editor = os.getenv('EDITOR', 'nvim')
+    editor = get_editor('nvim')
+    url = f"{vault_base_url}/income"
     
     try:
-        # Get original content from API
-        response = requests.get(f"{vault_base_url}/income", headers=headers)
-        
-        if response.status_code != 200:
-            print(f"\nStatus: {response.status_code}")
-            print(f"Response: {response.text}")
+        # Create temp file with original CSV content from API
+        fetched = fetch_to_temp(session, url, '.csv')
+        if fetched is None:
             return
-        
-        original_content = response.text.strip()
-        
-        # Create temp file with original CSV content
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as temp_file:
-            temp_file.write(original_content)
-            temp_path = temp_file.name
+        temp_path, original_digest = fetched
         
         try:
             # Open editor for editing
-            subprocess.run([editor, temp_path])
-            
-            # Read new content after editing
-            with open(temp_path, 'r') as f:
-                new_content = f.read().strip()
+            new_bytes = edit_file(editor, temp_path)
             
             # Check if changes were made
-            if original_content != new_content:
+            if new_bytes is not None and content_digest(new_bytes) != original_digest:
                 print("Changes detected!")
                 update_choice = input("Update income data on VPS? (y/n): ").strip().lower()
                 
                 if update_choice == 'y':
                     # Use PUT endpoint to replace entire file
-                    put_response = requests.put(
-                        f"{vault_base_url}/income",
-                        json={'content': new_content},
-                        headers=headers
-                    )
+                    put_response = put_if_unchanged(session, url, {'content': new_bytes.decode()}, url, temp_path)
                     print(f"\nUpdate Status: {put_response.status_code}")
                     print(f"Update Response: {put_response.text}")
                 else:
@@ -660,17 +885,14 @@ def edit_income(vault_base_url, headers):
     except Exception as e:
         print(f"Error editing income: {e}")
 
-def duplicate_and_edit_budget(vault_base_url, headers):
+def duplicate_and_edit_budget(session, vault_base_url):
     """Duplicate last month's budget and edit new month"""
-    editor = os.getenv('EDITOR', 'nvim')
+    editor = get_editor('nvim')
     
     try:
         # Duplicate last month to current month
         print("Duplicating last month's budget...")
-        duplicate_response = requests.post(
-            f"{vault_base_url}/budget/duplicate",
-            headers=headers
-        )
+        duplicate_response = session.post(f"{vault_base_url}/budget/duplicate")
         
         if duplicate_response.status_code != 201:
             print(f"\nStatus: {duplicate_response.status_code}")
@@ -690,7 +912,7 @@ def duplicate_and_edit_budget(vault_base_url, headers):
         
         try:
             # Open editor for editing
-            subprocess.run([editor, temp_path])
+            open_editor(editor, temp_path)
             
             # Read new content after editing
             with open(temp_path, 'r') as f:
@@ -703,10 +925,9 @@ def duplicate_and_edit_budget(vault_base_url, headers):
                 
                 if update_choice == 'y':
                     # Use PUT endpoint to replace entire file
-                    put_response = requests.put(
+                    put_response = session.put(
                         f"{vault_base_url}/budget",
-                        json={'content': new_content},
-                        headers=headers
+                        data=encode_json({'content': new_content})
                     )
                     print(f"\nUpdate Status: {put_response.status_code}")
                     print(f"Update Response: {put_response.text}")
@@ -722,42 +943,82 @@ def duplicate_and_edit_budget(vault_base_url, headers):
     except Exception as e:
         print(f"Error duplicating and editing budget: {e}")
 
-def financial_data_submenu(vault_base_url, headers):
+# Menu choice to editor in the financial data submenu
+_FINANCIAL_DATA_EDITORS = {
+    '1': edit_transactions,
+    '2': edit_categories,
+    '3': edit_budget,
+    '4': edit_income
+}
+
+def financial_data_submenu(session, vault_base_url):
     """Financial data submenu loop"""
     while True:
-        print("\n=== Financial Data ===")
-        choice = input("\n(1) Transactions, (2) Categories, (3) Budget, (4) Income, (5) Back: ").strip()
+        choice = input(_FINANCIAL_DATA_MENU).strip()
         
-        if choice == '1':
-            edit_transactions(vault_base_url, headers)
-        elif choice == '2':
-            edit_categories(vault_base_url, headers)
-        elif choice == '3':
-            edit_budget(vault_base_url, headers)
-        elif choice == '4':
-            edit_income(vault_base_url, headers)
+        edit = _FINANCIAL_DATA_EDITORS.get(choice)
+        if edit:
+            edit(session, vault_base_url)
         elif choice == '5':
             break
         else:
             print("Invalid choice. Press 1-5")
 
-def read_submenu(well_base_url, vault_base_url, headers):
+def read_submenu(session, well_base_url, vault_base_url):
     """Stay in read submenu loop"""
     while True:
-        print("\n=== Fetch ===")
-        choice = input("\n(1) Task, (2) Note, (3) Bookmark, (4) Finances, (5) Back: ").strip()
+        choice = input(_FETCH_MENU).strip()
         
-        if choice in '123':
-            entry_type = get_type_by_choice(choice)
-            if entry_type:
-                read_entry(well_base_url, headers, entry_type)
+        entry_type = _TYPE_MAP.get(choice)
+        if entry_type:
+            read_entry(session, well_base_url, entry_type)
         elif choice == '4':
-            financial_data_submenu(vault_base_url, headers)
+            financial_data_submenu(session, vault_base_url)
         elif choice == '5':
             break
         else:
             print("Invalid choice. Press 1-5")
 
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request"""
+    
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+def create_session(api_key):
+    """Create the HTTP session shared by all API calls"""
+    session = requests.Session()
+    session.headers.update({
+        'X-API-Key': api_key,
+        'Content-Type': 'application/json'
+    })
+    # Retry transient failures here rather than at every call site. POST is
+    # left out as appending an entry twice is worse than reporting an error.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'PUT']),
+        raise_on_status=False
+    )
+    # Everything goes to one host, a few connections covers background fetches.
+    # requests has no default timeout, so without one a stalled server
+    # would hang the prompt forever.
+    adapter = TimeoutHTTPAdapter(
+        timeout=_REQUEST_TIMEOUT,
+        max_retries=retry,
+        pool_connections=1,
+        pool_maxsize=4
+    )
+    session.mount('https://', adapter)
+    return session
+
 def main():
     """Main program loop"""
     # Load configuration
@@ -765,25 +1026,27 @@ def main():
     ascii_art = load_art()
     vault_base_url = "https://vulkan.sumeetsaini.com/vault"
     well_base_url = "https://vulkan.sumeetsaini.com/well"
-    headers = {
-        'X-API-Key': api_key,
-        'Content-Type': 'application/json'
-    }
     
-    while True:
-        print("\n=== BUCKET ===\n")
-        print(ascii_art)
-        choice = input("\n(1) Put Entry, (2) Fetch, (3) Exit: ").strip()
-        
-        if choice == '1':
-            write_submenu(well_base_url, vault_base_url, headers)
-        elif choice == '2':
-            read_submenu(well_base_url, vault_base_url, headers)
-        elif choice == '3':
-            print("Goodbye!")
-            break
-        else:
-            print("Invalid choice. Press 1-3")
+    main_menu = f"\n=== BUCKET ===\n\n{ascii_art}\n\n(1) Put Entry, (2) Fetch, (3) Exit: "
+    
+    # One session for the whole run so the connection to the API is reused
+    with create_session(api_key) as session:
+        while True:
+            choice = input(main_menu).strip()
+            
+            if choice == '1':
+                write_submenu(session, well_base_url, vault_base_url)
+            elif choice == '2':
+                read_submenu(session, well_base_url, vault_base_url)
+            elif choice == '3':
+                print("Goodbye!")
+                break
+            else:
+                print("Invalid choice. Press 1-3")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except EOFError:
+        # Input ran out, e.g. a script piped in the menu choices
+        print()